@@ -15,6 +15,7 @@ update_prompt_info() {
   local cwd="%K{blue}%F{cyan}${sep_r}%F{black}%~%k%F{blue}${sep_r}%f"
 
   local venv=""
+  # For faster startup, build prompt.pyz with scripts/build_prompt.sh and call that
   local git_raw="$("/home/brenden/repos/machine_setup/prompt.py")"
   local git_info=""
 
@@ -70,9 +71,13 @@ add-zsh-hook precmd update_prompt_info
 """
 
 # System imports
-# import os
+import fcntl
+import os
+import select
+import stat
 import subprocess
-from datetime import datetime
+import time
+import zlib
 
 # Third-party imports
 # from colorama import Back, Fore, Style, init
@@ -81,47 +86,375 @@ from datetime import datetime
 
 # init(autoreset=True)
 
+_HOME = os.path.expanduser("~")
+
+
+def _state_dir():
+    """Return the dir for this script's per-session state files.
+
+    Prefers $XDG_RUNTIME_DIR, which is cleared when the session ends, and
+    falls back to $XDG_CACHE_HOME (or ~/.cache).
+    """
+    base = (
+        os.environ.get("XDG_RUNTIME_DIR")
+        or os.environ.get("XDG_CACHE_HOME")
+        or os.path.join(_HOME, ".cache")
+    )
+    return os.path.join(base, "machine_setup")
+
+
+class _GitStatusdClient:
+    """Talk to a per-shell `gitstatusd` daemon over a pair of FIFOs.
+
+    The daemon is spawned once per parent shell (keyed on the shell's pid) and
+    outlives this script, so later prompts only pay for one request/response
+    round trip instead of forking git. See the gitstatus README for the
+    protocol: fields are separated by 0x1f and messages terminated by 0x1e.
+    """
+
+    TIMEOUT = 1.0
+
+    def __init__(self):
+        self.shell_pid = os.getppid()
+        self.state_dir = _state_dir()
+        base = os.path.join(self.state_dir, f"gitstatusd-{self.shell_pid}")
+        self.req_path = f"{base}.req"
+        self.resp_path = f"{base}.resp"
+        self.lock_path = f"{base}.lock"
+
+    @staticmethod
+    def find_binary():
+        """Return the path to gitstatusd, or None if it isn't installed."""
+        # Walk $PATH by hand; shutil.which would cost an import of re
+        for path_dir in os.environ.get("PATH", "").split(os.pathsep):
+            binary = os.path.join(path_dir or ".", "gitstatusd")
+            if os.path.isfile(binary) and os.access(binary, os.X_OK):
+                return binary
+        # powerlevel10k downloads its own copy into the gitstatus cache dir
+        uname = os.uname()
+        name = f"gitstatusd-{uname.sysname.lower()}-{uname.machine.lower()}"
+        cache_dir = os.environ.get("GITSTATUS_CACHE_DIR") or os.path.join(
+            os.environ.get("XDG_CACHE_HOME") or os.path.join(_HOME, ".cache"),
+            "gitstatus",
+        )
+        binary = os.path.join(cache_dir, name)
+        return binary if os.access(binary, os.X_OK) else None
+
+    def _make_fifo(self, path):
+        try:
+            if stat.S_ISFIFO(os.stat(path).st_mode):
+                return
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        os.mkfifo(path, 0o600)
+
+    def _remove_stale_files(self):
+        """Delete FIFOs and lockfiles left behind by shells that have exited."""
+        for name in os.listdir(self.state_dir):
+            if not name.startswith("gitstatusd-"):
+                continue
+            pid = name[len("gitstatusd-") :].partition(".")[0]
+            if not pid.isdigit() or int(pid) == self.shell_pid:
+                continue
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                try:
+                    os.unlink(os.path.join(self.state_dir, name))
+                except FileNotFoundError:
+                    pass
+            except PermissionError:
+                pass
+
+    def _spawn(self, binary):
+        self._remove_stale_files()
+        self._make_fifo(self.req_path)
+        self._make_fifo(self.resp_path)
+        # Opening both ends O_RDWR means the daemon never sees EOF when a
+        # client exits; it lives until the parent shell does.
+        req_fd = os.open(self.req_path, os.O_RDWR)
+        resp_fd = os.open(self.resp_path, os.O_RDWR)
+        try:
+            subprocess.Popen(
+                [
+                    binary,
+                    f"--parent-pid={self.shell_pid}",
+                    # Only a dirty flag is shown, so stop counting at one
+                    "--max-num-staged=1",
+                    "--max-num-unstaged=1",
+                    "--max-num-conflicted=1",
+                    "--max-num-untracked=1",
+                    "--dirty-max-index-size=-1",
+                ],
+                stdin=req_fd,
+                stdout=resp_fd,
+                stderr=subprocess.DEVNULL,
+                # Requests carry absolute paths; don't pin the first repo dir
+                cwd="/",
+                start_new_session=True,
+            )
+        finally:
+            os.close(req_fd)
+            os.close(resp_fd)
+
+    def _open_request_pipe(self):
+        """Return a writable fd to a live daemon, or None if there isn't one."""
+        try:
+            return os.open(self.req_path, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError:
+            # ENOENT: never spawned. ENXIO: no reader, the daemon has exited.
+            return None
+
+    def _roundtrip(self, req_fd, req_id, repo_dir):
+        resp_fd = os.open(self.resp_path, os.O_RDONLY | os.O_NONBLOCK)
+        try:
+            os.write(req_fd, f"{req_id}\x1f{repo_dir}\x1f0\x1e".encode())
+            buf = b""
+            while True:
+                ready, _, _ = select.select([resp_fd], [], [], self.TIMEOUT)
+                if not ready:
+                    return None
+                chunk = os.read(resp_fd, 4096)
+                if not chunk:
+                    return None
+                buf += chunk
+                while b"\x1e" in buf:
+                    msg, _, buf = buf.partition(b"\x1e")
+                    fields = msg.decode(errors="replace").split("\x1f")
+                    # Drop stale replies left behind by a client that timed out
+                    if fields[0] == req_id:
+                        return fields
+        finally:
+            os.close(resp_fd)
+
+    def query(self, repo_dir):
+        """Return a git info dict for `repo_dir`, or None if gitstatusd is unusable.
+
+        The dict has the keys `is_git`, `branch`, `commit` and `dirty`.
+        """
+        binary = self.find_binary()
+        if binary is None:
+            return None
+        try:
+            os.makedirs(self.state_dir, mode=0o700, exist_ok=True)
+            with open(self.lock_path, "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                req_fd = self._open_request_pipe()
+                if req_fd is None:
+                    self._spawn(binary)
+                    req_fd = self._open_request_pipe()
+                    if req_fd is None:
+                        return None
+                try:
+                    fields = self._roundtrip(req_fd, str(os.getpid()), repo_dir)
+                finally:
+                    os.close(req_fd)
+        except OSError:
+            return None
+
+        if fields is None or len(fields) < 2:
+            return None
+        if fields[1] != "1":
+            return {"is_git": False}
+        if len(fields) < 17:
+            return None
+        # fields: id, is_git, workdir, commit, local_branch, upstream_branch,
+        # remote_name, remote_url, action, index_size, staged, unstaged,
+        # conflicted, untracked, ahead, behind, stashes, ...
+        return {
+            "is_git": True,
+            # Detached HEAD has no local branch; show it as rev-parse would
+            "branch": fields[4] or "HEAD",
+            "commit": fields[3],
+            "dirty": any(int(n or 0) for n in fields[10:14]),
+        }
+
+
+def _find_git_dir(path):
+    """Return the git dir for the repo containing `path`, or None.
+
+    Follows `gitdir:` files so worktrees and submodules resolve to their own
+    git dir, and treats a directory with HEAD/objects/refs as a bare repo.
+    """
+    while True:
+        dot_git = os.path.join(path, ".git")
+        if os.path.isdir(dot_git):
+            return dot_git
+        if os.path.isfile(dot_git):
+            try:
+                with open(dot_git) as f:
+                    line = f.readline().strip()
+            except OSError:
+                return None
+            if not line.startswith("gitdir: "):
+                return None
+            return os.path.normpath(os.path.join(path, line[len("gitdir: ") :]))
+        if all(
+            os.path.exists(os.path.join(path, n)) for n in ("HEAD", "objects", "refs")
+        ):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def _git_cache_key(git_dir):
+    """Return (cache_file, key) for the repo with git dir `git_dir`, or None.
+
+    The key changes whenever HEAD moves: checkout rewrites HEAD, commits and
+    resets append to the HEAD reflog, and both rewrite the index.
+    """
+    key = [git_dir]
+    for name in ("HEAD", "index", os.path.join("logs", "HEAD")):
+        try:
+            key.append(str(os.stat(os.path.join(git_dir, name)).st_mtime_ns))
+        except FileNotFoundError:
+            key.append("")
+    if not key[1]:
+        return None
+    cache_file = os.path.join(
+        _state_dir(), f"prompt-git-{zlib.crc32(git_dir.encode()):08x}"
+    )
+    # The git dir is part of the key, so a crc32 collision is just a miss
+    return cache_file, "\t".join(key)
+
+
+def _git_cache_get(git_dir):
+    """Return the cached last-commit timestamp for `git_dir`, or None."""
+    cache = _git_cache_key(git_dir)
+    if cache is None:
+        return None
+    cache_file, key = cache
+    try:
+        with open(cache_file) as f:
+            cached_key, _, commit_ts = f.read().partition("\n")
+    except OSError:
+        return None
+    return commit_ts if cached_key == key else None
+
+
+def _git_cache_put(git_dir, commit_ts):
+    """Store `commit_ts` as the cached last-commit timestamp for `git_dir`."""
+    cache = _git_cache_key(git_dir)
+    if cache is None:
+        return
+    cache_file, key = cache
+    try:
+        os.makedirs(os.path.dirname(cache_file), mode=0o700, exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}"
+        with open(tmp_file, "w") as f:
+            f.write(f"{key}\n{commit_ts}")
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+
+def _git_output(args):
+    """Run git with `args` and return its stripped stdout."""
+    return (
+        subprocess.check_output(["git", *args], stderr=subprocess.DEVNULL)
+        .decode()
+        .strip()
+    )
+
+
+def _parse_git_porcelain(output):
+    """Parse `git status --porcelain=v2 --branch` output into a git info dict."""
+    info = {
+        "is_git": True,
+        "branch": "",
+        "ahead": 0,
+        "behind": 0,
+        "staged": 0,
+        "unstaged": 0,
+        "untracked": 0,
+        "unmerged": 0,
+        "stash": 0,
+    }
+    for line in output.splitlines():
+        c = line[0] if line else ""
+        if c in ("1", "2"):
+            # XY status: X is the index, Y the worktree, "." means unchanged
+            if line[2] != ".":
+                info["staged"] += 1
+            if line[3] != ".":
+                info["unstaged"] += 1
+        elif c == "?":
+            info["untracked"] += 1
+        elif c == "u":
+            info["unmerged"] += 1
+        elif c == "#":
+            if line.startswith("# branch.head "):
+                info["branch"] = line[len("# branch.head ") :]
+            elif line.startswith("# branch.ab "):
+                parts = line.split(None, 3)
+                info["ahead"] = int(parts[2][1:])
+                info["behind"] = int(parts[3][1:])
+            elif line.startswith("# stash "):
+                # only present with --show-stash (git 2.35+)
+                info["stash"] = int(line[len("# stash ") :])
+    if info["branch"] == "(detached)":
+        info["branch"] = "HEAD"
+    info["dirty"] = bool(
+        info["staged"] or info["unstaged"] or info["untracked"] or info["unmerged"]
+    )
+    return info
+
 
 def get_git_status():
     """Return current git branch and dirty flag, or '' if not in a repo."""
     try:
-        branch = (
-            subprocess.check_output(
-                ["git", "rev-parse", "--abbrev-ref", "HEAD"], stderr=subprocess.DEVNULL
-            )
-            .decode()
-            .strip()
+        cwd = os.getcwd()
+        git_dir = os.environ.get("GIT_DIR") or _find_git_dir(cwd)
+    except OSError:
+        # e.g. the shell's working directory has been deleted
+        return ""
+    if git_dir is None:
+        return ""
+    # Get last commit time (as seconds since epoch). It only changes when
+    # HEAD moves, so reuse the cached value when we have one.
+    commit_ts = _git_cache_get(git_dir)
+    log_proc = None
+    if commit_ts is None:
+        # git log is independent of the status lookup, so start it now and
+        # collect it afterwards instead of running the two back to back.
+        log_proc = subprocess.Popen(
+            ["git", "log", "-1", "--format=%ct"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
         )
-        status = bool(
-            subprocess.check_output(
-                ["git", "status", "--porcelain"], stderr=subprocess.DEVNULL
+    try:
+        info = _GitStatusdClient().query(cwd)
+        if info is None:
+            info = _parse_git_porcelain(
+                _git_output(["status", "--porcelain=v2", "--branch"])
             )
-            .decode()
-            .strip()
-        )
-        time_since_last_commit = get_time_since_last_commit()
-
-        dirty = "*" if status else ""
-        return f"{branch}{dirty} ({time_since_last_commit})"
+        if not info["is_git"]:
+            return ""
+        if log_proc is not None:
+            out, _ = log_proc.communicate()
+            if log_proc.returncode:
+                return ""
+            commit_ts = out.decode().strip()
+            _git_cache_put(git_dir, commit_ts)
     except subprocess.CalledProcessError:
         return ""
+    finally:
+        # Reap git log on early returns so it isn't left as a zombie
+        if log_proc is not None and log_proc.returncode is None:
+            log_proc.communicate()
+    time_since_last_commit = get_time_since_last_commit(commit_ts)
 
+    dirty = "*" if info["dirty"] else ""
+    return f"{info['branch']}{dirty} ({time_since_last_commit})"
 
-def get_time_since_last_commit():
-    """ """
-    # Get last commit time (as seconds since epoch)
-    commit_ts = (
-        subprocess.check_output(
-            ["git", "log", "-1", "--format=%ct"], stderr=subprocess.DEVNULL
-        )
-        .decode()
-        .strip()
-    )
 
+def get_time_since_last_commit(commit_ts):
+    """Format a commit timestamp (seconds since epoch) as e.g. '5m ago'."""
     if commit_ts:
-        commit_time = datetime.fromtimestamp(int(commit_ts))
-        delta = datetime.now() - commit_time
-        minutes = int(delta.total_seconds() // 60)
+        minutes = (int(time.time()) - int(commit_ts)) // 60
         if minutes < 60:
             ago = f"{minutes}m"
         elif minutes < 1440:
@@ -0,0 +1,26 @@
+#!/bin/bash
+# build_prompt.sh
+# Bundle prompt.py into prompt.pyz, a zipapp that starts faster on every prompt:
+#  * the shebang runs python with -S (skip site/.pth processing) and -I
+#    (ignore PYTHON* env vars and the user site dir)
+#  * the module is shipped precompiled, since zipimport can't cache bytecode.
+#    The source goes in too, so a Python upgrade falls back to it instead of
+#    failing on a bad magic number.
+# Rebuild after editing prompt.py. Override the interpreter with PYTHON=...
+# (the .pyc only loads on the Python version that built it).
+
+set -e
+
+REPO_DIR="$(cd "$(dirname "$0")/.." && pwd)"
+PYTHON="${PYTHON:-/usr/bin/python3}"
+
+stage="$(mktemp -d)"
+trap 'rm -rf "$stage"' EXIT
+
+# -p keeps the mtime so it matches the one recorded in the .pyc
+cp -p "$REPO_DIR/prompt.py" "$stage/prompt.py"
+"$PYTHON" -c 'import py_compile, sys; py_compile.compile(sys.argv[1], cfile=sys.argv[2], doraise=True)' \
+  "$stage/prompt.py" "$stage/prompt.pyc"
+"$PYTHON" -m zipapp "$stage" -m prompt:main -p "$PYTHON -SI" -o "$REPO_DIR/prompt.pyz"
+
+echo "Built $REPO_DIR/prompt.pyz"